@@ -4,9 +4,10 @@ log_setup.py
 Reusable Python logging setup with colourised output and configurable logging to file and/or console.
 
 Dependencies:
-- colourlog (install via `pip install colourlog`)
+- colorlog (install via `pip install colorlog`)
 - python-json-logger (optional, install via `pip install python-json-logger`)
 - tqdm (optional, install via `pip install tqdm`)
+- orjson (optional, faster JSON file output; install via `pip install orjson`)
 
 Usage:
 from log_setup import setup_logging
@@ -16,15 +17,58 @@ logger.info("Hello, logging!")
 logger.with_context(user_id="bob").info("Info with dynamic context")
 '''
 
+import atexit
+import copy
 import logging
+import multiprocessing.util
+import operator
 import os
+import queue
+import re
 import sys
 import json
 import time
+import socket
 import threading
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler, SysLogHandler
+import weakref
+from contextvars import ContextVar, Token
+from logging.handlers import (
+    RotatingFileHandler, TimedRotatingFileHandler, SysLogHandler, QueueHandler, QueueListener
+)
+from types import MappingProxyType
 from typing import Optional
-from functools import wraps
+from functools import wraps, lru_cache
+
+__all__ = [
+    "COLOUR_TIMESTAMP",
+    "COLOUR_CONTEXT_LABEL",
+    "COLOUR_MODULE_NAME",
+    "COLOUR_FILENAME",
+    "COLOUR_FUNCTION",
+    "COLOUR_LINENO",
+    "LOG_DATE_FORMAT",
+    "LOG_FORMAT_VERBOSE",
+    "LOG_FORMAT_COMPACT",
+    "LOG_FORMAT_SYSLOG",
+    "LOG_FORMAT_COLOURED",
+    "LOG_COLOURS",
+    "refresh_static_context",
+    "set_log_context",
+    "push_log_context",
+    "pop_log_context",
+    "clear_log_context",
+    "get_log_context",
+    "CompactContextFormatter",
+    "SmartFieldFormatter",
+    "ContextFilter",
+    "BufferedRotatingFileHandler",
+    "ContextualLoggerAdapter",
+    "setup_logging",
+    "log_exception",
+    "setup_syslog_logger",
+    "log_duration",
+    "tqdm_logging",
+]
 
 # 🎨 Colour config
 COLOUR_TIMESTAMP = "bold_purple"
@@ -39,6 +83,9 @@ try:
 except ImportError:
     raise ImportError("Please install 'colorlog' using pip: pip install colorlog")
 
+# SmartFieldFormatter's per-level fast path relies on these ColoredFormatter internals (colorlog 6.x)
+_COLORLOG_FAST_PATH = all(hasattr(colorlog.ColoredFormatter, name) for name in ("_colorize", "_escape_code_map"))
+
 try:
     from pythonjsonlogger import jsonlogger
 except ImportError:
@@ -49,24 +96,94 @@ try:
 except ImportError:
     tqdm = None
 
-_log_context = threading.local()
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+@lru_cache(maxsize=None)
+def _encoder_default(encoder_cls):
+    return encoder_cls().default
+
+def _orjson_dumps(obj, default=None, cls=None, **kwargs) -> str:
+    # orjson always emits compact UTF-8, so indent/ensure_ascii are not applicable; the
+    # formatter's encoder class still handles types orjson can't serialise natively
+    encoder_default = default
+    if encoder_default is None and cls is not None:
+        encoder_default = _encoder_default(cls)
+    try:
+        return orjson.dumps(obj, default=encoder_default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    except TypeError:
+        # e.g. integers above 64 bits or keys orjson rejects; json.dumps handles them
+        kwargs.setdefault("separators", (",", ":"))  # keep the orjson layout so lines stay uniform
+        return json.dumps(obj, default=default, cls=cls, **kwargs)
+
+_JSON_DUMPS = _orjson_dumps if orjson else json.dumps
+
+_scratch = threading.local()
+_EMPTY_DICT = MappingProxyType({})
+# Per-thread and per-asyncio-task context; each value is an immutable-by-convention mapping
+_LOG_CONTEXT = ContextVar("_pylogkit_ctx", default=_EMPTY_DICT)
+
+def refresh_static_context():
+    """Re-read hostname, pid and env; called automatically in the child after fork()."""
+    global _HOSTNAME, _PID, _ENV, _STATIC_CTX
+    _HOSTNAME = sys.intern(socket.gethostname())
+    _PID = os.getpid()
+    _ENV = sys.intern(os.getenv("APP_ENV", "dev"))
+    _STATIC_CTX = (
+        ("user_id", "-"),
+        ("session_id", "-"),
+        ("request_id", "-"),
+        ("hostname", _HOSTNAME),
+        ("env", _ENV),
+        ("pid", _PID),
+    )
+
+# Static per-process context, resolved once at import rather than per record
+refresh_static_context()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=refresh_static_context)
+
+_EMOJI_BY_LEVELNO = {
+    logging.DEBUG: '🐛',
+    logging.INFO: 'ℹ️',
+    logging.WARNING: '⚠️',
+    logging.ERROR: '❌',
+    logging.CRITICAL: '💥'
+}
+
+# Custom level names (registered via logging.addLevelName) have no fixed number
+_EMOJI_BY_LEVELNAME = {
+    'SYSTEM': '🖥️',
+    'SECURITY': '🔐',
+    'NETWORK': '🌐',
+    'DATABASE': '🗄️',
+    'STARTUP': '🚀',
+    'SHUTDOWN': '🛑'
+}
+
+def _intern_context(context: dict) -> dict:
+    # Keys come from a small fixed set; values such as request/session ids are unique per
+    # request, so interning them would only grow the intern table
+    return {sys.intern(k): v for k, v in context.items()}
 
 def set_log_context(**kwargs):
-    _log_context.data = kwargs
+    _LOG_CONTEXT.set(_intern_context(kwargs))
+
+def push_log_context(**kwargs) -> Token:
+    """Layer kwargs over the current context; pass the returned token to pop_log_context() to undo."""
+    return _LOG_CONTEXT.set({**_LOG_CONTEXT.get(), **_intern_context(kwargs)})
+
+def pop_log_context(token: Token):
+    _LOG_CONTEXT.reset(token)
 
 def clear_log_context():
-    _log_context.data = {}
+    _LOG_CONTEXT.set(_EMPTY_DICT)
 
 def get_log_context():
-    import socket
-    context = getattr(_log_context, 'data', {}).copy()
-    context.setdefault("user_id", "-")
-    context.setdefault("session_id", "-")
-    context.setdefault("request_id", "-")
-    context.setdefault("hostname", socket.gethostname())
-    context.setdefault("env", os.getenv("APP_ENV", "dev"))
-    context.setdefault("pid", os.getpid())
-    return context
+    # Returns the current context without copying; static fields are added by ContextFilter
+    return _LOG_CONTEXT.get()
 
 class CompactContextFormatter(colorlog.ColoredFormatter):
     def format(self, record):
@@ -77,65 +194,361 @@ class CompactContextFormatter(colorlog.ColoredFormatter):
 
         return super().format(record)
 
+# Only per-request fields go into %(context)s; hostname/env/pid are static and remain
+# available to format strings as %(hostname)s, %(env)s and %(pid)s
+_CONTEXT_FIELDS = ("user_id", "session_id", "request_id")
+_FORMAT_FIELD_RE = re.compile(r"%%|%\((\w+)\)s")
+_PERCENT_FIELD_RE = re.compile(r"%%|%\((\w+)\)([#0 +\-]*\d*(?:\.\d+)?[diouxXeEfFgGcrsa])")
+
+def _compile_percent_format(fmt: str):
+    """Compile a %(name)-style format into a function of record.__dict__ that formats positionally."""
+    keys = []
+
+    def positional(match):
+        if match.group(1) is None:
+            return match.group(0)
+        keys.append(match.group(1))
+        return "%" + match.group(2)
+
+    template = _PERCENT_FIELD_RE.sub(positional, fmt)
+    if not keys:
+        return lambda values: template % ()
+    getter = operator.itemgetter(*keys)
+    if len(keys) == 1:
+        return lambda values: template % (getter(values),)
+    return lambda values: template % getter(values)
+
+_CONTEXT_TEMPLATES = tuple(f"[{k}=%s]" for k in _CONTEXT_FIELDS)
+
+@lru_cache(maxsize=1024, typed=True)
+def _render_context(*values) -> str:
+    return " ".join([tmpl % (v,) for tmpl, v in zip(_CONTEXT_TEMPLATES, values) if v and v != "-"])
+
 class SmartFieldFormatter(colorlog.ColoredFormatter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._renderers_by_level = {}
+
     def format(self, record):
-        for key in ["user_id", "session_id", "request_id", "hostname", "env", "pid"]:
-            if not hasattr(record, key):
-                setattr(record, key, "")
-
-        field_map = {
-            "user_id": record.user_id,
-            "session_id": record.session_id,
-            "request_id": record.request_id,
-            "hostname": record.hostname,
-            "env": record.env,
-            "pid": record.pid
-        }
-
-        dynamic_fields = []
-        for k, v in field_map.items():
-            if v and v != "-":
-                dynamic_fields.append(f"[{k}={v}]")
-
-        record.context = " ".join(dynamic_fields)
+        d = record.__dict__
+        if d.get("user_id", "-") == "-" and d.get("session_id", "-") == "-" and d.get("request_id", "-") == "-":
+            record.context = ""
+            return super().format(record)
+
+        # ContextFilter normally sets these; default to "" for records that bypassed it
+        values = (d.get("user_id", ""), d.get("session_id", ""), d.get("request_id", ""))
+        try:
+            record.context = _render_context(*values)
+        except TypeError:  # unhashable context value
+            record.context = _render_context.__wrapped__(*values)
         return super().format(record)
 
+    def formatMessage(self, record):
+        # Colour codes only depend on the level, so resolve them into the format string once
+        # per level instead of letting colorlog copy the record and escape-code map every time.
+        if not _COLORLOG_FAST_PATH or type(self._style) is not logging.PercentStyle \
+                or getattr(self._style, "_defaults", None):
+            return super().formatMessage(record)
+        key = (record.levelname, self._colorize())
+        cached = self._renderers_by_level.get(key)
+        if cached is None:
+            cached = self._renderers_by_level[key] = self._build_level_renderer(record.levelname)
+        render, reset = cached
+        try:
+            message = render(record.__dict__)
+        except KeyError as e:
+            raise ValueError('Formatting field not found in record: %s' % e)
+        if self.reset and not message.endswith(reset):
+            message += reset
+        return message
+
+    def _build_level_renderer(self, levelname):
+        escapes = self._escape_code_map(levelname)
+
+        def resolve(match):
+            name = match.group(1)
+            return escapes[name] if name in escapes else match.group(0)
+
+        return _compile_percent_format(_FORMAT_FIELD_RE.sub(resolve, self._style._fmt)), escapes["reset"]
+
 class ContextFilter(logging.Filter):
     def filter(self, record):
-        context = get_log_context()
-        for k, v in context.items():
-            setattr(record, k, v)
-        emoji_map = {
-            'DEBUG': '🐛',
-            'INFO': 'ℹ️',
-            'WARNING': '⚠️',
-            'ERROR': '❌',
-            'CRITICAL': '💥',
-            'SYSTEM': '🖥️',
-            'SECURITY': '🔐',
-            'NETWORK': '🌐',
-            'DATABASE': '🗄️',
-            'STARTUP': '🚀',
-            'SHUTDOWN': '🛑'
-        }
-        setattr(record, 'emoji', emoji_map.get(record.levelname, ''))
+        # Attributes already on the record (caller extra, or context passed by the adapter) win
+        d = record.__dict__
+        setdefault = d.setdefault
+        for k, v in get_log_context().items():
+            setdefault(k, v)
+        for k, v in _STATIC_CTX:
+            setdefault(k, v)
+        emoji = _EMOJI_BY_LEVELNO.get(record.levelno)
+        d['emoji'] = emoji if emoji is not None else _EMOJI_BY_LEVELNAME.get(record.levelname, '')
         return True
 
+_FLUSHING_HANDLERS = weakref.WeakSet()
+
+def _flush_buffers_before_fork():
+    # Otherwise the child inherits the parent's unwritten buffer and writes it a second time
+    for handler in list(_FLUSHING_HANDLERS):
+        handler.flush()
+
+def _write_through_after_fork():
+    # Forked workers often leave via os._exit() or SIGTERM (multiprocessing Pool.terminate()),
+    # where nothing gets a chance to flush, so inherited handlers stop buffering in the child
+    for handler in list(_FLUSHING_HANDLERS):
+        handler._write_through = True
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_flush_buffers_before_fork, after_in_child=_write_through_after_fork)
+
+def _flush_periodically(handler_ref, stop: threading.Event, interval: float):
+    while not stop.wait(interval):
+        handler = handler_ref()
+        if handler is None:
+            return
+        handler.flush()
+        del handler
+
+class _PeriodicFlushMixin:
+    """Flushes a buffering handler from a daemon thread every `flush_interval` seconds, and on close."""
+
+    _write_through = False
+
+    def __init__(self, *args, flush_interval: float, **kwargs):
+        self._stop_flushing = threading.Event()
+        self._flush_interval = flush_interval
+        super().__init__(*args, **kwargs)
+        self._start_flusher()
+        _FLUSHING_HANDLERS.add(self)
+
+    def _start_flusher(self):
+        # The thread only holds a weak reference, so a dropped handler can still be collected
+        self._flusher = threading.Thread(target=_flush_periodically,
+                                         args=(weakref.ref(self), self._stop_flushing, self._flush_interval),
+                                         name=f"pylogkit-{type(self).__name__}-flusher", daemon=True)
+        self._flusher.start()
+
+    def handle(self, record):
+        rv = super().handle(record)
+        if rv and self._write_through:
+            self.flush()
+        return rv
+
+    def close(self):
+        self._stop_flushing.set()
+        self.flush()
+        super().close()
+
+class BufferedRotatingFileHandler(_PeriodicFlushMixin, RotatingFileHandler):
+    """RotatingFileHandler that writes through a 64 KB buffer and flushes on a timer instead of per record."""
+
+    buffer_size = 64 * 1024
+
+    def __init__(self, *args, flush_interval: float = 0.2, **kwargs):
+        self._size = 0
+        super().__init__(*args, flush_interval=flush_interval, **kwargs)
+
+    def _open(self):
+        open_func = getattr(self, "_builtin_open", open)  # stdlib keeps open() usable during shutdown
+        stream = open_func(self.baseFilename, self.mode, buffering=self.buffer_size,
+                           encoding=self.encoding, errors=getattr(self, "errors", None))
+        self._size = os.fstat(stream.fileno()).st_size
+        return stream
+
+    def emit(self, record):
+        # Track the file size ourselves: the stdlib check seeks the stream, which forces a flush
+        try:
+            msg = self.format(record) + self.terminator
+            size = len(msg.encode(self.encoding or "utf-8", getattr(self, "errors", None) or "strict"))
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0 and self._size and self._size + size >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self._size += size
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+class _BatchingSyslogHandler(_PeriodicFlushMixin, SysLogHandler):
+    """TCP SysLogHandler that coalesces octet-counted records (RFC 6587) into one sendall() per batch."""
+
+    max_batch_bytes = 8 * 1024
+    connect_timeout = 1.0
+
+    def __init__(self, address=("localhost", 514), facility=SysLogHandler.LOG_USER, flush_interval: float = 0.1):
+        self._buffer = bytearray()
+        self._last_record = None
+        super().__init__(address=address, facility=facility, socktype=socket.SOCK_STREAM,
+                         flush_interval=flush_interval)
+
+    def createSocket(self):
+        if isinstance(self.address, str):
+            return super().createSocket()  # Unix socket path: the stdlib connect does not block
+        # Bound the connect so an unreachable collector can't stall setup; sends stay blocking
+        sock = socket.create_connection(self.address, timeout=self.connect_timeout)
+        sock.settimeout(None)
+        self.unixsocket = False
+        self.socket = sock
+
+    def emit(self, record):
+        # Same message as SysLogHandler.emit, but octet-counted instead of NUL-terminated so the
+        # collector can split a batch back into records, and buffered instead of sent immediately
+        try:
+            msg = self.format(record)
+            if self.ident:
+                msg = self.ident + msg
+            prio = '<%d>' % self.encodePriority(self.facility, self.mapPriority(record.levelname))
+            frame = prio.encode('utf-8') + msg.encode('utf-8')
+            self._buffer += b'%d ' % len(frame) + frame
+            self._last_record = record
+            if len(self._buffer) >= self.max_batch_bytes:
+                self._send_batch()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._buffer:
+                self._send_batch()
+        except Exception:
+            self.handleError(self._last_record)
+        finally:
+            self.release()
+
+    def _send_batch(self):
+        batch = bytes(self._buffer)
+        self._buffer.clear()
+        self.socket.sendall(batch)
+
+class _ContextQueueHandler(QueueHandler):
+    """QueueHandler for an in-process queue: renders the message but keeps exc_info and stack_info."""
+
+    def prepare(self, record):
+        # Nothing is pickled, so the real handlers can still format exceptions themselves
+        # (e.g. the JSON formatter's separate exc_info field)
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        return record
+
 class ContextualLoggerAdapter(logging.LoggerAdapter):
     def __init__(self, logger):
         super().__init__(logger, {})
 
     def process(self, msg, kwargs):
-        context = get_log_context()
-        kwargs.setdefault("extra", {}).update(context)
+        # Only reached for enabled levels: LoggerAdapter.log checks isEnabledFor first.
+        # makeRecord copies extra onto the record, so one dict per thread can be reused.
+        extra = getattr(_scratch, 'extra', None)
+        if extra is None:
+            extra = _scratch.extra = {}
+        caller_extra = kwargs.get("extra")
+        if caller_extra is extra:
+            return msg, kwargs  # nested adapter: the outer one already merged context and caller extra
+        extra.clear()
+        extra.update(get_log_context())
+        if caller_extra:
+            extra.update(caller_extra)
+        kwargs["extra"] = extra
         return msg, kwargs
 
     def with_context(self, **context):
-        prev_context = get_log_context().copy()
-        combined_context = prev_context.copy()
-        combined_context.update(context)
-        set_log_context(**combined_context)
-        return self
+        return _ContextScope(self, push_log_context(**context))
+
+class _ContextScope:
+    """Proxies the adapter returned by with_context(); as a context manager it restores the previous context on exit."""
+
+    __slots__ = ("_adapter", "_token")
+
+    def __init__(self, adapter: ContextualLoggerAdapter, token: Token):
+        self._adapter = adapter
+        self._token = token
+
+    def __getattr__(self, name):
+        return getattr(self._adapter, name)
+
+    def __enter__(self) -> ContextualLoggerAdapter:
+        return self._adapter
+
+    def __exit__(self, *exc_info):
+        pop_log_context(self._token)
+
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+LOG_FORMAT_VERBOSE = (
+    "%(asctime)s [%(levelname)s] [%(name)s] [%(filename)s:%(lineno)d %(funcName)s()] %(context)s - %(message)s"
+)
+
+LOG_FORMAT_COMPACT = ("[%(levelname)s] %(message)s")
+
+LOG_FORMAT_SYSLOG = "%(name)s[%(process)d]: %(levelname)s %(message)s"
+
+LOG_FORMAT_COLOURED = (
+    f"%({COLOUR_TIMESTAMP})s%(asctime)s%(reset)s "
+    "[%(log_color)s%(levelname)s %(emoji)s%(reset)s] "
+    f"[%({COLOUR_MODULE_NAME})s%(name)s%(reset)s] "
+    f"%({COLOUR_FILENAME})s%(filename)s%(reset)s::"
+    f"%({COLOUR_FUNCTION})s%(funcName)s%(reset)s():"
+    f"%({COLOUR_LINENO})s%(lineno)d%(reset)s "
+    f"%({COLOUR_CONTEXT_LABEL})s%(context)s%(reset)s - "
+    "%(log_color)s%(message)s%(reset)s"
+)
+
+LOG_COLOURS = {
+    'DEBUG':    'cyan',
+    'INFO':     'blue',
+    'WARNING':  'yellow',
+    'ERROR':    'red',
+    'CRITICAL': 'bold_red'
+}
+
+# Formatters are stateless, so each kind is built once and shared by every setup_logging call
+_FORMATTERS = {}
+_FORMATTERS_LOCK = threading.Lock()
+
+# ContextFilter holds no state, so every configured logger shares one instance
+_SHARED_CONTEXT_FILTER = ContextFilter()
+
+# Cached handlers and how many listeners use each; a handler is closed once nothing uses it
+_HANDLERS = {}
+_HANDLER_REFS = {}
+_HANDLERS_LOCK = threading.Lock()
+
+_QUEUED_LOGGERS = weakref.WeakSet()
+
+def _build_formatter(kind: str) -> logging.Formatter:
+    if kind == "verbose":
+        return SmartFieldFormatter(
+            fmt=LOG_FORMAT_COLOURED,
+            datefmt=LOG_DATE_FORMAT,
+            log_colors=LOG_COLOURS,
+            secondary_log_colors={'message': LOG_COLOURS},
+            style='%',
+            reset=True
+        )
+    if kind == "compact":
+        return logging.Formatter(LOG_FORMAT_COMPACT, datefmt=LOG_DATE_FORMAT)
+    if kind == "file":
+        return SmartFieldFormatter(LOG_FORMAT_VERBOSE, datefmt=LOG_DATE_FORMAT)
+    if kind == "json":
+        return jsonlogger.JsonFormatter(json_serializer=_JSON_DUMPS, json_ensure_ascii=False)
+    if kind == "syslog":
+        return logging.Formatter(LOG_FORMAT_SYSLOG)
+    raise ValueError(f"Unknown formatter kind: {kind}")
+
+def _get_formatter(kind: str) -> logging.Formatter:
+    formatter = _FORMATTERS.get(kind)
+    if formatter is None:
+        with _FORMATTERS_LOCK:
+            formatter = _FORMATTERS.get(kind)
+            if formatter is None:
+                formatter = _FORMATTERS[kind] = _build_formatter(kind)
+    return formatter
 
 def setup_logging(name: Optional[str] = None,
                   overwrite: bool = False,
@@ -155,161 +568,246 @@ def setup_logging(name: Optional[str] = None,
                   rotation: str = "size",
                   max_bytes: int = 5*1024*1024,
                   backup_count: int = 2,
-                  context: Optional[dict] = None) -> logging.Logger:
+                  context: Optional[dict] = None,
+                  syslog_batch: bool = False) -> logging.Logger:
+    levels = _resolve_levels(level, console_level, file_level, json_level, syslog_level)
     logger = logging.getLogger(name)
     logger.setLevel(logging.DEBUG)  # set to DEBUG globally; control per handler
     logger.handlers.clear()
+    # Hold the previous handlers until the new set is built so they can be reused
+    previous_handlers = _stop_listener(logger)
 
-    logger.addFilter(ContextFilter())
+    if not any(isinstance(f, ContextFilter) for f in logger.filters):
+        logger.addFilter(_SHARED_CONTEXT_FILTER)
     if context:
         set_log_context(**context)
 
-    log_format_verbose = (
-        "%(asctime)s [%(levelname)s] [%(name)s] [%(filename)s:%(lineno)d %(funcName)s()] %(context)s - %(message)s"
-    )
-
-    log_format_compact = ("[%(levelname)s] %(message)s")
-
     if jsonlogger:
-        json_formatter = jsonlogger.JsonFormatter(json_ensure_ascii=False)
-        formatter = SmartFieldFormatter(
-            fmt=f"%({COLOUR_TIMESTAMP})s%(asctime)s%(reset)s "
-                "[%(log_color)s%(levelname)s %(emoji)s%(reset)s] "
-                f"[%({COLOUR_MODULE_NAME})s%(name)s%(reset)s] "
-                f"%({COLOUR_FILENAME})s%(filename)s%(reset)s::"
-                f"%({COLOUR_FUNCTION})s%(funcName)s%(reset)s():"
-                f"%({COLOUR_LINENO})s%(lineno)d%(reset)s "
-                f"%({COLOUR_CONTEXT_LABEL})s%(context)s%(reset)s - "
-                "%(log_color)s%(message)s%(reset)s",
-
-            datefmt="%Y-%m-%d %H:%M:%S",
-            log_colors={
-                'DEBUG':    'cyan',
-                'INFO':     'blue',
-                'WARNING':  'yellow',
-                'ERROR':    'red',
-                'CRITICAL': 'bold_red'
-            },
-            secondary_log_colors={
-                'message': {
-                    'DEBUG':    'cyan',
-                    'INFO':     'blue',
-                    'WARNING':  'yellow',
-                    'ERROR':    'red',
-                    'CRITICAL': 'bold_red'
-                }
-            },
-            style='%',
-            reset=True
-        )
-
-
+        json_formatter = _get_formatter("json")
+        formatter = _get_formatter("verbose")
     elif mode == "compact":
-        formatter = logging.Formatter(log_format_compact, datefmt="%Y-%m-%d %H:%M:%S")
+        formatter = _get_formatter("compact")
     else:
-        formatter = SmartFieldFormatter(
-            fmt=f"%({COLOUR_TIMESTAMP})s%(asctime)s%(reset)s "
-                "[%(log_color)s%(levelname)s %(emoji)s%(reset)s] "
-                f"[%({COLOUR_MODULE_NAME})s%(name)s%(reset)s] "
-                f"%({COLOUR_FILENAME})s%(filename)s%(reset)s::"
-                f"%({COLOUR_FUNCTION})s%(funcName)s%(reset)s():"
-                f"%({COLOUR_LINENO})s%(lineno)d%(reset)s "
-                f"%({COLOUR_CONTEXT_LABEL})s%(context)s%(reset)s - "
-                "%(log_color)s%(message)s%(reset)s",
-
-            datefmt="%Y-%m-%d %H:%M:%S",
-            log_colors={
-                'DEBUG':    'cyan',
-                'INFO':     'blue',
-                'WARNING':  'yellow',
-                'ERROR':    'red',
-                'CRITICAL': 'bold_red'
-            },
-            secondary_log_colors={
-                'message': {
-                    'DEBUG':    'cyan',
-                    'INFO':     'blue',
-                    'WARNING':  'yellow',
-                    'ERROR':    'red',
-                    'CRITICAL': 'bold_red'
-                }
-            },
-            style='%',
-            reset=True
-        )
+        formatter = _get_formatter("verbose")
+
+    real_handlers = []
 
     if to_console:
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel((console_level or level).upper())
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        console_handler = _cached_handler(logging.StreamHandler, sys.stdout, levels[console_level or level],
+                                          formatter, lambda: logging.StreamHandler(sys.stdout))
+        real_handlers.append(console_handler)
 
     if to_file and file_path:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True) if os.path.dirname(file_path) else None
+        _ensure_parent_dir(file_path)
+        file_path_abs = os.path.abspath(file_path)
         if rotation == "time":
             mode = 'w' if overwrite else 'a'
-            file_handler = TimedRotatingFileHandler(file_path, when="midnight", backupCount=backup_count, encoding='utf-8')
+            file_handler = _cached_handler(
+                TimedRotatingFileHandler, (file_path_abs, backup_count), levels[file_level or level],
+                _get_formatter("file"),
+                lambda: TimedRotatingFileHandler(file_path, when="midnight", backupCount=backup_count, encoding='utf-8'))
         else:
             mode = 'w' if overwrite else 'a'
-            file_handler = RotatingFileHandler(file_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
-        file_handler.setLevel((file_level or level).upper())
-        file_formatter = SmartFieldFormatter(log_format_verbose, datefmt="%Y-%m-%d %H:%M:%S")
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+            file_handler = _cached_handler(
+                BufferedRotatingFileHandler, (file_path_abs, max_bytes, backup_count), levels[file_level or level],
+                _get_formatter("file"),
+                lambda: BufferedRotatingFileHandler(file_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'))
+        real_handlers.append(file_handler)
 
     if to_json_file and json_file_path and jsonlogger:
-        if os.path.dirname(json_file_path):
-            os.makedirs(os.path.dirname(json_file_path), exist_ok=True)
+        _ensure_parent_dir(json_file_path)
         mode = 'w' if overwrite else 'a'
-        json_handler = RotatingFileHandler(json_file_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
-        json_handler.setLevel((json_level or level).upper())
-        json_handler.setFormatter(json_formatter)
-        logger.addHandler(json_handler)
-
-
+        json_handler = _cached_handler(
+            BufferedRotatingFileHandler, (os.path.abspath(json_file_path), max_bytes, backup_count),
+            levels[json_level or level], json_formatter,
+            lambda: BufferedRotatingFileHandler(json_file_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'))
+        real_handlers.append(json_handler)
 
     if to_syslog:
-        syslog_handler = SysLogHandler(address=("localhost", 514))
-        syslog_handler.setLevel((syslog_level or level).upper())
-        syslog_formatter = logging.Formatter("%(name)s[%(process)d]: %(levelname)s %(message)s")
-        syslog_handler.setFormatter(syslog_formatter)
-        logger.addHandler(syslog_handler)
-
+        syslog_handler = _cached_handler(
+            _BatchingSyslogHandler if syslog_batch else SysLogHandler, ("localhost", 514),
+            levels[syslog_level or level], _get_formatter("syslog"),
+            lambda: _new_syslog_handler(("localhost", 514), syslog_batch))
+        real_handlers.append(syslog_handler)
+
+    # Callers only enqueue; formatting and I/O happen on the listener thread
+    if real_handlers:
+        log_queue = queue.Queue(-1)
+        logger.addHandler(_ContextQueueHandler(log_queue))
+        _start_listener(logger, log_queue, real_handlers)
+        _retain_handlers(real_handlers)
+
+    _release_handlers(previous_handlers)
     return logger
 
+def _resolve_levels(*names: Optional[str]) -> dict:
+    # Validate each distinct level name once and map it to its number for Handler.setLevel
+    levels = {}
+    for name in names:
+        if name and name not in levels:
+            levelno = logging.getLevelName(name.upper())
+            if not isinstance(levelno, int):
+                raise ValueError(f"Unknown logging level: {name!r}")
+            levels[name] = levelno
+    return levels
+
+def _ensure_parent_dir(path: str):
+    # Not cached: the directory may be removed between calls (log pruning, test cleanup)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+def _cached_handler(handler_type, target, level: int, formatter: logging.Formatter, factory) -> logging.Handler:
+    # Reuse a live handler for the same destination so repeated setup_logging calls don't reopen files
+    key = (handler_type, target, level, formatter)
+    with _HANDLERS_LOCK:
+        handler = _HANDLERS.get(key)
+        if handler is None:
+            handler = factory()
+            # A factory may fall back to another type (e.g. UDP syslog); cache it under the real one
+            key = (type(handler),) + key[1:]
+            cached = _HANDLERS.get(key)
+            if cached is not None:
+                handler.close()
+                return cached
+            handler.setLevel(level)
+            handler.setFormatter(formatter)
+            _HANDLERS[key] = handler
+    return handler
+
+def _retain_handlers(handlers):
+    with _HANDLERS_LOCK:
+        for handler in handlers:
+            _HANDLER_REFS[handler] = _HANDLER_REFS.get(handler, 0) + 1
+
+def _release_handlers(handlers):
+    unused = []
+    with _HANDLERS_LOCK:
+        for handler in handlers:
+            count = _HANDLER_REFS.get(handler, 0) - 1
+            if count > 0:
+                _HANDLER_REFS[handler] = count
+                continue
+            _HANDLER_REFS.pop(handler, None)
+            for key in [key for key, cached in _HANDLERS.items() if cached is handler]:
+                del _HANDLERS[key]
+            unused.append(handler)
+    for handler in unused:
+        handler.close()
+
+def _start_listener(logger: logging.Logger, log_queue: queue.Queue, handlers):
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    logger._pylogkit_listener = listener
+    atexit.register(listener.stop)
+    _QUEUED_LOGGERS.add(logger)
+
+class _DirectQueue:
+    """Stand-in for a listener's queue that hands each record straight to the listener's handlers."""
+
+    __slots__ = ("_listener",)
+
+    def __init__(self, listener: QueueListener):
+        self._listener = listener
+
+    def put_nowait(self, record):
+        self._listener.handle(record)
+
+def _dispatch_directly_after_fork():
+    # The listener thread does not survive fork(), and a worker killed by Pool.terminate() would
+    # lose anything still queued, so the child handles records synchronously in the calling thread
+    for logger in list(_QUEUED_LOGGERS):
+        listener = getattr(logger, "_pylogkit_listener", None)
+        if listener is None:
+            continue
+        atexit.unregister(listener.stop)
+        listener._thread = None
+        for handler in logger.handlers:
+            if isinstance(handler, _ContextQueueHandler):
+                handler.queue = _DirectQueue(listener)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispatch_directly_after_fork)
+
+def _finish_logging_in_child():
+    # Drain each listener so records queued just before the child exits still reach the handlers
+    for logger in list(_QUEUED_LOGGERS):
+        _stop_listener(logger)
+
+def _register_child_finalizer(_func):
+    # multiprocessing children leave through os._exit(), which skips atexit, but run its finalizers
+    multiprocessing.util.Finalize(None, _finish_logging_in_child, exitpriority=10)
+
+multiprocessing.util.register_after_fork(_finish_logging_in_child, _register_child_finalizer)
+
+def _stop_listener(logger: logging.Logger) -> tuple:
+    listener = getattr(logger, "_pylogkit_listener", None)
+    if listener is None:
+        return ()
+    atexit.unregister(listener.stop)
+    if listener._thread is not None:  # None in a forked child, where records bypass the thread
+        listener.stop()
+    logger._pylogkit_listener = None
+    return listener.handlers
+
 def log_exception(logger: logging.Logger, msg: str):
     logger.exception(msg)
 
+def _new_syslog_handler(address, batch: bool) -> SysLogHandler:
+    # Batches are a TCP stream; a Unix socket path such as /dev/log keeps one message per record
+    if batch and not isinstance(address, str):
+        try:
+            return _BatchingSyslogHandler(address=address)
+        except OSError:
+            pass  # no TCP syslog listener; fall back to one UDP datagram per record
+    return SysLogHandler(address=address)
+
 def setup_syslog_logger(name: str = "myapp",
                         level: str = "INFO",
-                        address: tuple = ("localhost", 514)) -> logging.Logger:
+                        address: tuple = ("localhost", 514),
+                        batch: bool = False) -> logging.Logger:
     logger = logging.getLogger(name)
     logger.setLevel(level.upper())
-    handler = SysLogHandler(address=address)
-    formatter = logging.Formatter("%(name)s[%(process)d]: %(levelname)s %(message)s")
-    handler.setFormatter(formatter)
+    handler = _new_syslog_handler(address, batch)
+    handler.setFormatter(_get_formatter("syslog"))
     logger.addHandler(handler)
     return logger
 
 def log_duration(logger: logging.Logger, level: str = "info"):
+    log_method = getattr(logger, level)
+    # Method names such as "exception" are not level names; those always time the call
+    levelno = logging.getLevelName(level.upper())
+    if not isinstance(levelno, int):
+        levelno = None
+
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            start = time.time()
+            if levelno is not None and not logger.isEnabledFor(levelno):
+                return func(*args, **kwargs)
+            start = time.monotonic_ns()
             result = func(*args, **kwargs)
-            duration = time.time() - start
-            getattr(logger, level)(f"{func.__name__} took {duration:.4f} seconds")
+            log_method("%s took %.4f ms", func.__name__, (time.monotonic_ns() - start) / 1e6)
             return result
         return wrapper
     return decorator
 
+_PROGRESS_LOG_MASK = 0x3FF  # log fallback progress every 1024 items
+
 def tqdm_logging(iterable, logger: logging.Logger, level: str = "info"):
     if tqdm:
-        return tqdm(iterable)
-    else:
-        for index, item in enumerate(iterable, 1):
-            getattr(logger, level)(f"Progress: {index}/{len(iterable)}")
-            yield item
+        yield from tqdm(iterable)
+        return
+
+    log_method = getattr(logger, level)
+    total = len(iterable) if hasattr(iterable, "__len__") else "?"
+    index = 0
+    for index, item in enumerate(iterable, 1):
+        if (index & _PROGRESS_LOG_MASK) == 0:
+            log_method("Progress: %d/%s", index, total)
+        yield item
+    if index & _PROGRESS_LOG_MASK:
+        log_method("Progress: %d/%s", index, total)
 
 # Example usage
 if __name__ == "__main__":
@@ -1,4 +1,37 @@
-from setuptools import setup, find_packages
+from setuptools import setup, find_packages, Extension
+from setuptools.command.build_ext import build_ext
+
+# Optional: when Cython is available, compile the logging hot path (ContextFilter,
+# SmartFieldFormatter, ContextualLoggerAdapter) from the same source. Without it the
+# pure-Python module is installed as-is. Cython is deliberately not a build-system
+# requirement, so an isolated build (plain `pip install .`) stays pure Python; to get
+# the compiled module, install Cython first and run
+# `pip install --no-build-isolation .`.
+try:
+    from Cython.Build import cythonize
+    ext_modules = cythonize(
+        [Extension("pylogkit.log_setup", ["pylogkit/log_setup.py"], optional=True)],
+        compiler_directives={"language_level": 3},
+    )
+except Exception:  # Cython missing or unable to translate the module
+    ext_modules = []
+
+
+class optional_build_ext(build_ext):
+    """Fall back to the pure-Python module when the extension cannot be built (e.g. no compiler)."""
+
+    def run(self):
+        try:
+            super().run()
+        except Exception as exc:
+            self.warn(f"building the compiled pylogkit.log_setup failed ({exc}); using pure Python")
+
+    def build_extension(self, ext):
+        try:
+            super().build_extension(ext)
+        except Exception as exc:
+            self.warn(f"building {ext.name} failed ({exc}); using pure Python")
+
 
 setup(
     name='pylogkit',
@@ -6,10 +39,15 @@ setup(
     description='A structured and colourised logging toolkit for Python apps',
     author='Mark Bacon',
     packages=find_packages(),
+    ext_modules=ext_modules,
+    cmdclass={'build_ext': optional_build_ext},
     install_requires=[
-        'colourlog>=6.0.0',
+        'colorlog>=6.0.0',
         'python-json-logger>=2.0.7'
     ],
+    extras_require={
+        'fast': ['orjson'],
+    },
     classifiers=[
         'Programming Language :: Python :: 3',
         'Operating System :: OS Independent',
@@ -0,0 +1,45 @@
+import logging
+import unittest
+
+from pylogkit import log_setup
+
+
+class _RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class ContextualLoggerAdapterTest(unittest.TestCase):
+    def setUp(self):
+        self.handler = _RecordingHandler()
+        self.logger = logging.getLogger("pylogkit-test-adapter")
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+        log_setup.set_log_context(user_id="ctx", request_id="req")
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        log_setup.clear_log_context()
+
+    def test_caller_extra_wins_over_context(self):
+        adapter = log_setup.ContextualLoggerAdapter(self.logger)
+        adapter.info("x", extra={"user_id": "caller"})
+        record = self.handler.records[-1]
+        self.assertEqual(record.user_id, "caller")
+        self.assertEqual(record.request_id, "req")
+
+    def test_nested_adapters_keep_caller_extra(self):
+        adapter = log_setup.ContextualLoggerAdapter(log_setup.ContextualLoggerAdapter(self.logger))
+        adapter.info("x", extra={"user_id": "caller"})
+        record = self.handler.records[-1]
+        self.assertEqual(record.user_id, "caller")
+        self.assertEqual(record.request_id, "req")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+
+from pylogkit import log_setup
+
+
+def _log_from_child(name, message):
+    logging.getLogger(name).info(message)
+
+
+def _log_from_pool_worker(args):
+    name, index = args
+    logging.getLogger(name).info("from worker %d", index)
+    return index
+
+
+@unittest.skipUnless(sys.platform != "win32" and hasattr(os, "fork"), "requires fork()")
+class ForkedChildLoggingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ctx = multiprocessing.get_context("fork")
+
+    def tearDown(self):
+        for name in list(logging.Logger.manager.loggerDict):
+            if name.startswith("pylogkit-test-"):
+                logger = logging.getLogger(name)
+                logger.handlers.clear()
+                log_setup._release_handlers(log_setup._stop_listener(logger))
+        self.tmpdir.cleanup()
+
+    def _setup(self, name, **kwargs):
+        path = os.path.join(self.tmpdir.name, f"{name}.log")
+        logger = log_setup.setup_logging(name, to_console=False, to_file=True, file_path=path, **kwargs)
+        return logger, path
+
+    def _read_after_stop(self, logger, path):
+        # Stopping the listener drains the queue; releasing closes (and flushes) the handlers
+        logger.handlers.clear()
+        log_setup._release_handlers(log_setup._stop_listener(logger))
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_process_child_record_reaches_time_rotated_file(self):
+        logger, path = self._setup("pylogkit-test-time", rotation="time")
+        child = self.ctx.Process(target=_log_from_child, args=(logger.name, "from child"))
+        child.start()
+        child.join()
+        self.assertEqual(child.exitcode, 0)
+        logger.info("from parent")
+        contents = self._read_after_stop(logger, path)
+        self.assertEqual(contents.count("from child"), 1)
+        self.assertEqual(contents.count("from parent"), 1)
+
+    def test_process_child_record_reaches_buffered_file(self):
+        logger, path = self._setup("pylogkit-test-size")
+        child = self.ctx.Process(target=_log_from_child, args=(logger.name, "from child"))
+        child.start()
+        child.join()
+        self.assertEqual(child.exitcode, 0)
+        contents = self._read_after_stop(logger, path)
+        self.assertEqual(contents.count("from child"), 1)
+
+    def test_terminated_pool_worker_records_reach_buffered_file(self):
+        logger, path = self._setup("pylogkit-test-pool")
+        # Leaving the with-block calls Pool.terminate(), so workers never run their exit hooks
+        with self.ctx.Pool(4) as pool:
+            pool.map(_log_from_pool_worker, [(logger.name, i) for i in range(4)])
+        contents = self._read_after_stop(logger, path)
+        for i in range(4):
+            self.assertEqual(contents.count(f"from worker {i}"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
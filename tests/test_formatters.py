@@ -0,0 +1,49 @@
+import logging
+import unittest
+from unittest import mock
+
+from pylogkit import log_setup
+
+
+def _record(levelname="INFO", **extra):
+    record = logging.makeLogRecord({"name": "pylogkit-test", "msg": "hello %s", "args": ("world",),
+                                    "levelname": levelname, "levelno": logging.getLevelName(levelname),
+                                    **extra})
+    log_setup.ContextFilter().filter(record)
+    return record
+
+
+class SmartFieldFormatterTest(unittest.TestCase):
+    def _format_both_ways(self, record_factory):
+        fast = log_setup.SmartFieldFormatter(log_setup.LOG_FORMAT_VERBOSE, datefmt=log_setup.LOG_DATE_FORMAT)
+        with mock.patch.object(log_setup, "_COLORLOG_FAST_PATH", False):
+            slow = log_setup.SmartFieldFormatter(log_setup.LOG_FORMAT_VERBOSE, datefmt=log_setup.LOG_DATE_FORMAT)
+            expected = slow.format(record_factory())
+        return fast.format(record_factory()), expected
+
+    def test_fast_path_matches_colorlog(self):
+        for levelname in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"):
+            actual, expected = self._format_both_ways(lambda: _record(levelname, created=0.0, msecs=0.0))
+            self.assertEqual(actual, expected)
+
+    def test_fast_path_matches_colorlog_with_context(self):
+        actual, expected = self._format_both_ways(
+            lambda: _record(created=0.0, msecs=0.0, user_id="u1", request_id="r1"))
+        self.assertEqual(actual, expected)
+        self.assertIn("[user_id=u1] [request_id=r1]", actual)
+
+
+@unittest.skipUnless(log_setup.jsonlogger, "requires python-json-logger")
+class JsonFormatterTest(unittest.TestCase):
+    def test_fallback_serialisation_keeps_compact_layout(self):
+        formatter = log_setup._get_formatter("json")
+        native = formatter.format(_record(small=1))
+        # Integers wider than 64 bits are rejected by orjson and go through json.dumps instead
+        fallback = formatter.format(_record(big=2 ** 70))
+        self.assertIn('"small":1', native)
+        self.assertIn('"big":%d' % 2 ** 70, fallback)
+        self.assertNotIn('": ', fallback)
+
+
+if __name__ == "__main__":
+    unittest.main()
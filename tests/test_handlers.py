@@ -0,0 +1,54 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from pylogkit import log_setup
+
+
+class BufferedRotatingFileHandlerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "app.log")
+
+    def _handler(self, **kwargs):
+        handler = log_setup.BufferedRotatingFileHandler(self.path, encoding="utf-8", flush_interval=60, **kwargs)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.addCleanup(handler.close)
+        return handler
+
+    def _emit(self, handler, message):
+        handler.handle(logging.makeLogRecord({"msg": message, "levelname": "INFO", "levelno": logging.INFO}))
+
+    def test_rotation_counts_encoded_bytes(self):
+        handler = self._handler(maxBytes=1000, backupCount=5)
+        for i in range(40):
+            self._emit(handler, "line %03d %s" % (i, "❌" * 10))  # 3 bytes per character in UTF-8
+        handler.close()
+        files = [f for f in os.listdir(self.tmpdir.name) if f.startswith("app.log")]
+        self.assertGreater(len(files), 1)
+        for name in files:
+            self.assertLessEqual(os.path.getsize(os.path.join(self.tmpdir.name, name)), 1000)
+
+    def test_records_are_buffered_until_flush(self):
+        handler = self._handler(maxBytes=0)
+        self._emit(handler, "buffered")
+        self.assertEqual(os.path.getsize(self.path), 0)
+        handler.flush()
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "buffered\n")
+
+    def test_size_resumes_from_existing_file(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("x" * 990)
+        handler = self._handler(maxBytes=1000, backupCount=1)
+        self._emit(handler, "overflows the limit")
+        handler.close()
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "overflows the limit\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
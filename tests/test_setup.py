@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pylogkit import log_setup
+
+
+class SetupLoggingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.loggers = []
+
+    def tearDown(self):
+        for logger in self.loggers:
+            self._teardown(logger)
+        self.tmpdir.cleanup()
+
+    def _setup(self, name, path, **kwargs):
+        logger = log_setup.setup_logging(name, to_console=False, to_file=True, file_path=path, **kwargs)
+        self.loggers.append(logger)
+        return logger
+
+    @staticmethod
+    def _teardown(logger):
+        logger.handlers.clear()
+        log_setup._release_handlers(log_setup._stop_listener(logger))
+
+    def test_recreates_log_directory_removed_between_calls(self):
+        log_dir = os.path.join(self.tmpdir.name, "logs")
+        path = os.path.join(log_dir, "app.log")
+        for name in ("pylogkit-test-dir-a", "pylogkit-test-dir-b"):
+            logger = self._setup(name, path)
+            logger.info("written")
+            self._teardown(logger)
+            with open(path, encoding="utf-8") as f:
+                self.assertIn("written", f.read())
+            shutil.rmtree(log_dir)
+
+    def test_shared_handler_is_closed_when_no_logger_uses_it(self):
+        first = os.path.join(self.tmpdir.name, "first.log")
+        second = os.path.join(self.tmpdir.name, "second.log")
+        a = self._setup("pylogkit-test-ref-a", first)
+        b = self._setup("pylogkit-test-ref-b", first)
+        shared = a._pylogkit_listener.handlers[0]
+        self.assertIs(b._pylogkit_listener.handlers[0], shared)
+
+        self._setup("pylogkit-test-ref-a", second)
+        self.assertIn(shared, log_setup._HANDLER_REFS)
+        self.assertIsNotNone(shared.stream)
+
+        self._setup("pylogkit-test-ref-b", second)
+        self.assertNotIn(shared, log_setup._HANDLER_REFS)
+        self.assertNotIn(shared, log_setup._HANDLERS.values())
+        self.assertIsNone(shared.stream)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import logging.handlers
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from pylogkit import log_setup
+
+
+def _split_octet_counted(data):
+    frames = []
+    while data:
+        length, _, rest = data.partition(b" ")
+        frames.append(rest[:int(length)])
+        data = rest[int(length):]
+    return frames
+
+
+class SyslogHandlerTest(unittest.TestCase):
+    def setUp(self):
+        self.logger = None
+
+    def tearDown(self):
+        if self.logger is not None:
+            for handler in self.logger.handlers:
+                handler.close()
+            self.logger.handlers.clear()
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix sockets")
+    def test_unix_socket_address_with_batching_requested(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.sock")
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.addCleanup(server.close)
+            server.bind(path)
+            server.settimeout(5)
+            self.logger = log_setup.setup_syslog_logger("pylogkit-test-unix", address=path, batch=True)
+            self.logger.info("over a unix socket")
+            self.assertIn(b"over a unix socket", server.recv(4096))
+            self.assertIs(type(self.logger.handlers[0]), logging.handlers.SysLogHandler)
+
+    def test_batching_is_opt_in(self):
+        self.logger = log_setup.setup_syslog_logger("pylogkit-test-default", address=("127.0.0.1", 9))
+        self.assertIs(type(self.logger.handlers[0]), logging.handlers.SysLogHandler)
+
+    def test_tcp_batch_is_octet_counted(self):
+        server = socket.create_server(("127.0.0.1", 0))
+        self.addCleanup(server.close)
+        received = []
+
+        def accept():
+            conn, _ = server.accept()
+            with conn:
+                while True:
+                    chunk = conn.recv(4096)
+                    if not chunk:
+                        break
+                    received.append(chunk)
+
+        reader = threading.Thread(target=accept)
+        reader.start()
+        handler = log_setup._BatchingSyslogHandler(address=server.getsockname(), flush_interval=60)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        for i in range(3):
+            handler.handle(logging.makeLogRecord({"msg": "record %d", "args": (i,), "levelname": "INFO"}))
+        handler.close()
+        reader.join(5)
+        self.assertEqual(_split_octet_counted(b"".join(received)),
+                         [b"<14>record 0", b"<14>record 1", b"<14>record 2"])
+
+
+if __name__ == "__main__":
+    unittest.main()